@@ -16,7 +16,8 @@ Docs used:
 - /traded for total markets traded by wallet
 
 Run:
-  pip install requests
+  pip install requests aiohttp orjson
+  pip install numpy   # optional, only used when TRADES_LIMIT >= VECTORIZE_MIN_TRADES
   python polymarket_monitor.py
 
 Optional env vars:
@@ -27,13 +28,34 @@ from __future__ import annotations
 
 import os
 import time
+import queue
+import threading
+import asyncio
+import bisect
 import json
+import random
+import re
 import sqlite3
 import hashlib
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-
+from email.utils import parsedate_to_datetime
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    try:
+        import numpy as np
+    except ImportError:  # optional: only needed for the large-batch path
+        np = None
 
 
 DATA_API_BASE = "https://data-api.polymarket.com"
@@ -46,9 +68,20 @@ DATA_API_BASE = "https://data-api.polymarket.com"
 # Polling
 POLL_SECONDS = 8
 
+# Max in-flight wallet enrichment requests per poll batch
+ENRICH_CONCURRENCY = 10
+
+# On these statuses the next poll waits Retry-After (if sent) or an exponential backoff, capped here
+RATE_LIMIT_STATUSES = (429, 503)
+MAX_BACKOFF_SECONDS = 300
+
 # Pull this many recent trades each poll
 TRADES_LIMIT = 100
 
+# At or above this TRADES_LIMIT (backfill/replay), /trades rows are filtered column-wise
+# with numpy before any Trade objects are built. Falls back to the row path without numpy.
+VECTORIZE_MIN_TRADES = 1000
+
 # Only look at trades above this threshold (in CASH terms per API filter)
 # NOTE: Data API supports filterType=CASH + filterAmount. This is the quickest way
 # to ignore noise. Tune as needed (e.g., 1000, 3000, 6000).
@@ -60,6 +93,11 @@ FRESH_DAYS = 14
 # "Low activity" threshold: total markets traded <= this number
 LOW_ACTIVITY_MARKETS = 6
 
+# Wallet enrichment cache TTLs. Profiles missing traded/first-seen data (API error,
+# 404, malformed response) are cached too, but expire sooner so they get retried.
+WALLET_CACHE_SECONDS = 6 * 3600
+WALLET_NEGATIVE_CACHE_SECONDS = 900
+
 # Cluster window: if same wallet triggers >= CLUSTER_COUNT within CLUSTER_MINUTES, boost score
 CLUSTER_MINUTES = 120
 CLUSTER_COUNT = 2
@@ -77,6 +115,10 @@ W_CLUSTER = 2
 BIG_TRADE_TIER_1 = 10000
 BIG_TRADE_TIER_2 = 25000
 
+# Discord: alerts for the same wallet queued within this many seconds are sent as one post
+DISCORD_COALESCE_SECONDS = 2.0
+DISCORD_MAX_CHARS = 1900
+
 # Markets filtering (optional): include only if title contains any keyword
 # Leave empty list to include all.
 INCLUDE_KEYWORDS: List[str] = []  # e.g. ["venezuela", "maduro", "iran", "taiwan"]
@@ -84,12 +126,24 @@ INCLUDE_KEYWORDS: List[str] = []  # e.g. ["venezuela", "maduro", "iran", "taiwan
 # Markets filtering (optional): exclude if title contains any keyword
 EXCLUDE_KEYWORDS: List[str] = ["sports"]
 
+# Seen-trade dedup: in-memory stable Bloom filter. Each block of SEEN_FILTER_CELLS (1 byte per
+# cell) reliably remembers SEEN_FILTER_HORIZON inserts; the filter gets enough blocks to
+# remember 2x TRADES_LIMIT, i.e. every trade the feed can hand back again (see seen_filter_cells).
+SEEN_FILTER_CELLS = 128 * 1024
+SEEN_FILTER_HORIZON = 2000
+
+# How long seen_trades rows are kept beyond the cluster window (also the startup rehydrate window)
+SEEN_RETENTION_DAYS = 7
+
+# How often old seen_trades / wallet_hits rows are pruned
+PRUNE_INTERVAL_SECONDS = 24 * 3600
+
 
 # ---------------------------
 # Data structures
 # ---------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     proxy_wallet: str
     side: str
@@ -101,23 +155,83 @@ class Trade:
     slug: str
     outcome: str
     tx_hash: str
+    est_cash: float = field(init=False, default=0.0)
 
-    @property
-    def est_cash(self) -> float:
+    def __post_init__(self) -> None:
         # /trades doesn't expose usdcSize, but it DOES expose size + price.
         # This estimate is still useful for ranking/thresholding.
         try:
-            return float(self.size) * float(self.price)
+            self.est_cash = float(self.size) * float(self.price)
         except Exception:
-            return 0.0
+            self.est_cash = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class WalletProfile:
     wallet: str
     traded_markets: Optional[int]
     first_seen_ts: Optional[int]
     recent_cash_24h: Optional[float]
+    # recent_cash_24h is lazy: None with recent_cash_fetched=True means "looked up, API had no data"
+    recent_cash_fetched: bool = False
+
+    @property
+    def incomplete(self) -> bool:
+        # Scoring inputs missing -> short negative-cache TTL
+        return self.traded_markets is None or self.first_seen_ts is None
+
+
+class StableBloomFilter:
+    """
+    Fixed-size stable Bloom filter (Deng & Rafiei) for streaming tx_hash dedup.
+
+    Each add() decays `decrement` cells before setting the key's cells to max_value, so old
+    entries age out. The decay has to be sized to the filter: too little and the cells
+    saturate, the false-positive rate climbs toward 100% and every trade falls through to
+    SQLite anyway. With 4 hashes, max 7 and 64 decrements per add the long-run
+    false-positive rate settles around 1-2% regardless of size, and a key reliably
+    survives SEEN_FILTER_HORIZON (~2000) later inserts per SEEN_FILTER_CELLS block.
+
+    A hit may be a false positive (confirm against SQLite); a miss is trusted as "new",
+    so the filter must be sized to outlive the feed window (seen_filter_cells).
+    """
+
+    def __init__(self, num_cells: int = SEEN_FILTER_CELLS, num_hashes: int = 4, decrement: int = 64, max_value: int = 7) -> None:
+        self.cells = bytearray(num_cells)
+        self.num_hashes = num_hashes
+        self.decrement = decrement
+        self.max_value = max_value
+        self._rng = random.Random()
+
+    def _indexes(self, key: str) -> List[int]:
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = len(self.cells)
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        cells = self.cells
+        return all(cells[i] for i in self._indexes(key))
+
+    def add(self, key: str) -> None:
+        cells = self.cells
+        m = len(cells)
+        start = self._rng.randrange(m)
+        for j in range(self.decrement):
+            i = (start + j) % m
+            if cells[i]:
+                cells[i] -= 1
+        for i in self._indexes(key):
+            cells[i] = self.max_value
+
+
+def seen_filter_cells(trades_limit: int) -> int:
+    # A miss skips SQLite, so every hash the feed can return again (the last trades_limit
+    # inserts) must still be in the filter; keep 2x headroom.
+    blocks = max(1, -(-2 * trades_limit // SEEN_FILTER_HORIZON))
+    return SEEN_FILTER_CELLS * blocks
 
 
 # ---------------------------
@@ -125,7 +239,15 @@ class WalletProfile:
 # ---------------------------
 
 def db_connect(path: str = "polymarket_monitor.sqlite") -> sqlite3.Connection:
-    conn = sqlite3.connect(path)
+    # Autocommit mode: batches are wrapped explicitly in db_transaction().
+    conn = sqlite3.connect(path, isolation_level=None, cached_statements=256)
+    # WAL + synchronous=NORMAL: no fsync per commit, readers don't block the writer.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA busy_timeout=30000")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS seen_trades (
             tx_hash TEXT PRIMARY KEY,
@@ -134,15 +256,21 @@ def db_connect(path: str = "polymarket_monitor.sqlite") -> sqlite3.Connection:
             condition_id TEXT
         )
     """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_trades_ts ON seen_trades(timestamp)")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS wallet_cache (
             wallet TEXT PRIMARY KEY,
             traded_markets INTEGER,
             first_seen_ts INTEGER,
             recent_cash_24h REAL,
-            updated_at INTEGER
+            updated_at INTEGER,
+            recent_cash_fetched INTEGER NOT NULL DEFAULT 0
         )
     """)
+    # Older DBs predate the lazy recent_cash_24h lookup
+    cache_columns = {row[1] for row in conn.execute("PRAGMA table_info(wallet_cache)")}
+    if "recent_cash_fetched" not in cache_columns:
+        conn.execute("ALTER TABLE wallet_cache ADD COLUMN recent_cash_fetched INTEGER NOT NULL DEFAULT 0")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS wallet_hits (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -150,85 +278,267 @@ def db_connect(path: str = "polymarket_monitor.sqlite") -> sqlite3.Connection:
             hit_ts INTEGER
         )
     """)
-    conn.commit()
+    # Covering index: the startup hit load (and any per-wallet window count) never touches the table rows
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hits_wallet_ts ON wallet_hits(wallet, hit_ts)")
+
+    # Give the planner index stats on a fresh DB; the daily prune keeps them current via PRAGMA optimize
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        conn.execute("ANALYZE")
     return conn
 
 
-def db_seen_trade(conn: sqlite3.Connection, tx_hash: str) -> bool:
-    cur = conn.execute("SELECT 1 FROM seen_trades WHERE tx_hash = ?", (tx_hash,))
-    return cur.fetchone() is not None
+@contextmanager
+def db_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def db_seen_trades(conn: sqlite3.Connection, tx_hashes: List[str], chunk_size: int = 500) -> Set[str]:
+    # One IN (...) query per chunk (stays under SQLite's bound-variable limit)
+    seen: Set[str] = set()
+    for i in range(0, len(tx_hashes), chunk_size):
+        chunk = tx_hashes[i:i + chunk_size]
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"SELECT tx_hash FROM seen_trades WHERE tx_hash IN ({placeholders})", chunk)
+        seen.update(row[0] for row in cur)
+    return seen
 
 
-def db_mark_trade_seen(conn: sqlite3.Connection, t: Trade) -> None:
-    conn.execute(
+def db_recent_trade_hashes(conn: sqlite3.Connection, since_ts: int) -> Iterator[str]:
+    # Oldest first, so the newest hashes (the ones the feed can still return) are added last
+    cur = conn.execute("SELECT tx_hash FROM seen_trades WHERE timestamp >= ? ORDER BY timestamp", (since_ts,))
+    for (tx_hash,) in cur:
+        yield tx_hash
+
+
+def db_prune_seen_trades(conn: sqlite3.Connection, before_ts: int) -> int:
+    cur = conn.execute("DELETE FROM seen_trades WHERE timestamp < ?", (before_ts,))
+    return cur.rowcount
+
+
+def seen_trade_hashes(conn: sqlite3.Connection, seen_filter: StableBloomFilter, tx_hashes: List[str]) -> Set[str]:
+    # Bloom miss => new trade, no SQLite lookup. Only hits are confirmed, in a single query.
+    maybe_seen = [h for h in tx_hashes if h in seen_filter]
+    if not maybe_seen:
+        return set()
+    return db_seen_trades(conn, maybe_seen)
+
+
+def seen_cutoff_ts(now: int) -> int:
+    return now - CLUSTER_MINUTES * 60 - SEEN_RETENTION_DAYS * 86400
+
+
+def db_mark_trades_seen(conn: sqlite3.Connection, trades: List[Trade]) -> None:
+    conn.executemany(
         "INSERT OR REPLACE INTO seen_trades (tx_hash, timestamp, wallet, condition_id) VALUES (?, ?, ?, ?)",
-        (t.tx_hash, t.timestamp, t.proxy_wallet, t.condition_id),
+        [(t.tx_hash, t.timestamp, t.proxy_wallet, t.condition_id) for t in trades],
     )
-    conn.commit()
 
 
-def db_get_wallet_cache(conn: sqlite3.Connection, wallet: str, max_age_seconds: int = 6 * 3600) -> Optional[WalletProfile]:
+def db_get_wallet_cache(
+    conn: sqlite3.Connection,
+    wallet: str,
+    now: int,
+    max_age_seconds: int = WALLET_CACHE_SECONDS,
+    negative_max_age_seconds: int = WALLET_NEGATIVE_CACHE_SECONDS,
+) -> Optional[WalletProfile]:
     cur = conn.execute(
-        "SELECT traded_markets, first_seen_ts, recent_cash_24h, updated_at FROM wallet_cache WHERE wallet = ?",
+        "SELECT traded_markets, first_seen_ts, recent_cash_24h, recent_cash_fetched, updated_at FROM wallet_cache WHERE wallet = ?",
         (wallet,),
     )
     row = cur.fetchone()
     if not row:
         return None
 
-    traded_markets, first_seen_ts, recent_cash_24h, updated_at = row
-    now = int(time.time())
-    if updated_at is not None and (now - int(updated_at)) <= max_age_seconds:
-        return WalletProfile(wallet=wallet, traded_markets=traded_markets, first_seen_ts=first_seen_ts, recent_cash_24h=recent_cash_24h)
+    traded_markets, first_seen_ts, recent_cash_24h, recent_cash_fetched, updated_at = row
+    if updated_at is None:
+        return None
+
+    profile = WalletProfile(
+        wallet=wallet,
+        traded_markets=traded_markets,
+        first_seen_ts=first_seen_ts,
+        recent_cash_24h=recent_cash_24h,
+        recent_cash_fetched=bool(recent_cash_fetched),
+    )
+    ttl = negative_max_age_seconds if profile.incomplete else max_age_seconds
+    if (now - int(updated_at)) <= ttl:
+        return profile
     return None
 
 
-def db_set_wallet_cache(conn: sqlite3.Connection, profile: WalletProfile) -> None:
-    conn.execute(
+def db_set_wallet_caches(conn: sqlite3.Connection, profiles: List[WalletProfile], now: int) -> None:
+    conn.executemany(
         """
-        INSERT OR REPLACE INTO wallet_cache (wallet, traded_markets, first_seen_ts, recent_cash_24h, updated_at)
-        VALUES (?, ?, ?, ?, ?)
+        INSERT OR REPLACE INTO wallet_cache (wallet, traded_markets, first_seen_ts, recent_cash_24h, recent_cash_fetched, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
         """,
-        (
-            profile.wallet,
-            profile.traded_markets,
-            profile.first_seen_ts,
-            profile.recent_cash_24h,
-            int(time.time()),
-        ),
+        [(p.wallet, p.traded_markets, p.first_seen_ts, p.recent_cash_24h, int(p.recent_cash_fetched), now) for p in profiles],
     )
-    conn.commit()
 
 
-def db_add_wallet_hit(conn: sqlite3.Connection, wallet: str, hit_ts: int) -> None:
-    conn.execute("INSERT INTO wallet_hits (wallet, hit_ts) VALUES (?, ?)", (wallet, hit_ts))
-    conn.commit()
+def db_set_wallet_recent_cash(conn: sqlite3.Connection, profiles: List[WalletProfile]) -> None:
+    conn.executemany(
+        "UPDATE wallet_cache SET recent_cash_24h = ?, recent_cash_fetched = 1 WHERE wallet = ?",
+        [(p.recent_cash_24h, p.wallet) for p in profiles],
+    )
 
 
-def db_count_wallet_hits(conn: sqlite3.Connection, wallet: str, since_ts: int) -> int:
+def db_add_wallet_hits(conn: sqlite3.Connection, hits: List[Tuple[str, int]]) -> None:
+    conn.executemany("INSERT INTO wallet_hits (wallet, hit_ts) VALUES (?, ?)", hits)
+
+
+def db_recent_wallet_hits(conn: sqlite3.Connection, since_ts: int) -> Iterator[Tuple[str, int]]:
     cur = conn.execute(
-        "SELECT COUNT(*) FROM wallet_hits WHERE wallet = ? AND hit_ts >= ?",
-        (wallet, since_ts),
+        "SELECT wallet, hit_ts FROM wallet_hits WHERE hit_ts >= ? ORDER BY wallet, hit_ts",
+        (since_ts,),
     )
-    return int(cur.fetchone()[0])
+    for wallet, hit_ts in cur:
+        yield wallet, int(hit_ts)
+
+
+def db_prune_wallet_hits(conn: sqlite3.Connection, before_ts: int) -> int:
+    cur = conn.execute("DELETE FROM wallet_hits WHERE hit_ts < ?", (before_ts,))
+    return cur.rowcount
+
+
+# ---------------------------
+# Cluster window (in memory; wallet_hits table is only for restart recovery)
+# ---------------------------
+
+WalletHits = Dict[str, Deque[int]]
+
+
+def load_wallet_hits(conn: sqlite3.Connection, since_ts: int) -> WalletHits:
+    hits: WalletHits = defaultdict(deque)
+    for wallet, hit_ts in db_recent_wallet_hits(conn, since_ts):
+        hits[wallet].append(hit_ts)
+    return hits
+
+
+def count_wallet_hit(hits: WalletHits, wallet: str, hit_ts: int, since_ts: int) -> int:
+    # Hits are only sorted within a poll batch, so insert in order (late/old hits land
+    # near the front) and then age out the front; everything left is >= since_ts.
+    # Usually an append, so amortized O(1) per hit.
+    dq = hits[wallet]
+    bisect.insort(dq, hit_ts)
+    while dq and dq[0] < since_ts:
+        dq.popleft()
+    return len(dq)
+
+
+def prune_wallet_hits(hits: WalletHits, since_ts: int) -> None:
+    # Drop wallets whose newest hit has left the window so the dict doesn't grow forever
+    for wallet in [w for w, dq in hits.items() if not dq or dq[-1] < since_ts]:
+        del hits[wallet]
 
 
 # ---------------------------
 # Polymarket API calls
 # ---------------------------
 
-_session = requests.Session()
-_session.headers.update({"User-Agent": "polymarket-anomaly-monitor/1.0"})
+USER_AGENT = "polymarket-anomaly-monitor/1.0"
+
+def _new_session() -> requests.Session:
+    # Pooled keep-alive connections so polls don't pay a TLS handshake each time.
+    # raise_on_status=False: once retries are exhausted the last response is returned and raise_for_status() reports it.
+    # Rate limits (RATE_LIMIT_STATUSES / Retry-After) are left to the poll loop's backoff: retrying them here
+    # would block the event loop in time.sleep and keep hitting the limited endpoint.
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT, "Connection": "keep-alive"})
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=50,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _new_session()
+
+# Used only by the Discord worker thread (requests.Session isn't shared across threads)
+_discord_session = _new_session()
+
+# Wallet enrichment runs concurrently on aiohttp; both are created inside the event loop (see poll_forever).
+_aio_session: Optional[aiohttp.ClientSession] = None
+_enrich_sem: Optional[asyncio.Semaphore] = None
+
 
+# Last ETag per path for conditional GETs (see http_get(conditional=True))
+_etags: Dict[str, str] = {}
 
-def http_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: int = 20) -> Any:
+
+def http_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: int = 20, conditional: bool = False) -> Any:
+    # conditional=True sends the previous ETag as If-None-Match; a 304 (nothing changed
+    # since the last poll) returns None without reading or parsing a body.
     url = f"{DATA_API_BASE}{path}"
-    r = _session.get(url, params=params or {}, timeout=timeout)
+    headers = {}
+    if conditional and path in _etags:
+        headers["If-None-Match"] = _etags[path]
+    r = _session.get(url, params=params or {}, headers=headers, timeout=timeout)
+    if conditional and r.status_code == 304:
+        return None
     r.raise_for_status()
-    return r.json()
+    if conditional:
+        etag = r.headers.get("ETag")
+        if etag:
+            _etags[path] = etag
+        else:
+            _etags.pop(path, None)
+    return orjson.loads(r.content)
 
 
-def fetch_recent_large_trades(limit: int, min_cash_filter: float) -> List[Trade]:
+async def http_get_async(path: str, params: Optional[Dict[str, Any]] = None, timeout: int = 20) -> Any:
+    assert _aio_session is not None and _enrich_sem is not None, "enrichment session not started"
+    url = f"{DATA_API_BASE}{path}"
+    async with _enrich_sem:
+        async with _aio_session.get(url, params=params or {}, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+            r.raise_for_status()
+            return orjson.loads(await r.read())
+
+
+def http_error_status(e: Exception) -> Optional[int]:
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code
+    return None
+
+
+def retry_after_seconds(e: Exception) -> Optional[float]:
+    # Retry-After is either delta-seconds or an HTTP-date
+    if isinstance(e, aiohttp.ClientResponseError):
+        value = e.headers.get("Retry-After") if e.headers else None
+    elif isinstance(e, requests.HTTPError) and e.response is not None:
+        value = e.response.headers.get("Retry-After")
+    else:
+        value = None
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_BACKOFF_SECONDS)
+
+
+def _fetch_trade_rows(limit: int, min_cash_filter: float) -> List[Dict[str, Any]]:
     # Uses the Data API /trades endpoint with filterType=CASH + filterAmount.
     # Docs: /trades query params include filterType and filterAmount, and can be called without user to get global feed.
     data = http_get(
@@ -239,10 +549,17 @@ def fetch_recent_large_trades(limit: int, min_cash_filter: float) -> List[Trade]
             "filterType": "CASH",
             "filterAmount": str(min_cash_filter),
         },
+        conditional=True,
     )
+    if not isinstance(data, list):
+        # None = 304: feed unchanged since the last poll, so every trade in it was already handled
+        return []
+    return [row for row in data if isinstance(row, dict)]
 
+
+def fetch_recent_large_trades(limit: int, min_cash_filter: float) -> List[Trade]:
     trades: List[Trade] = []
-    for row in data:
+    for row in _fetch_trade_rows(limit, min_cash_filter):
         try:
             trades.append(
                 Trade(
@@ -263,9 +580,43 @@ def fetch_recent_large_trades(limit: int, min_cash_filter: float) -> List[Trade]
     return trades
 
 
-def fetch_traded_markets_count(wallet: str) -> Optional[int]:
+_TRADE_STR_COLUMNS = {
+    "proxy_wallet": "proxyWallet",
+    "side": "side",
+    "condition_id": "conditionId",
+    "title": "title",
+    "slug": "slug",
+    "outcome": "outcome",
+    "tx_hash": "transactionHash",
+}
+
+
+def _float_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except Exception:
+        return float("nan")
+
+
+def fetch_recent_large_trades_vec(limit: int, min_cash_filter: float) -> Dict[str, np.ndarray]:
+    # Column-wise (SoA) variant of fetch_recent_large_trades for large batches; requires numpy.
+    # Rows with unparseable or non-finite size/price/timestamp are flagged in the "valid" column instead of skipped.
+    rows = _fetch_trade_rows(limit, min_cash_filter)
+    n = len(rows)
+    cols = {
+        name: np.array([row.get(key) or "" for row in rows], dtype=object)
+        for name, key in _TRADE_STR_COLUMNS.items()
+    }
+    for name in ("size", "price", "timestamp"):
+        cols[name] = np.fromiter((_float_or_nan(row.get(name, 0)) for row in rows), dtype=np.float64, count=n)
+    # NaN (unparseable) and inf/overflow are both dropped, as the row path skips them
+    cols["valid"] = np.isfinite(cols["size"]) & np.isfinite(cols["price"]) & np.isfinite(cols["timestamp"])
+    return cols
+
+
+async def fetch_traded_markets_count(wallet: str) -> Optional[int]:
     # Data API /traded returns {"user": "...", "traded": <int>}
-    data = http_get("/traded", params={"user": wallet})
+    data = await http_get_async("/traded", params={"user": wallet})
     if isinstance(data, dict) and "traded" in data:
         try:
             return int(data["traded"])
@@ -274,9 +625,9 @@ def fetch_traded_markets_count(wallet: str) -> Optional[int]:
     return None
 
 
-def fetch_wallet_first_seen_ts(wallet: str) -> Optional[int]:
+async def fetch_wallet_first_seen_ts(wallet: str) -> Optional[int]:
     # Data API /activity supports sorting; we request oldest record (ASC) with limit=1
-    data = http_get(
+    data = await http_get_async(
         "/activity",
         params={
             "user": wallet,
@@ -296,11 +647,10 @@ def fetch_wallet_first_seen_ts(wallet: str) -> Optional[int]:
     return None
 
 
-def fetch_wallet_recent_cash_24h(wallet: str) -> Optional[float]:
+async def fetch_wallet_recent_cash_24h(wallet: str, now: int) -> Optional[float]:
     # Pull recent trades (DESC), sum usdcSize over last 24h if present.
-    now = int(time.time())
     start = now - 24 * 3600
-    data = http_get(
+    data = await http_get_async(
         "/activity",
         params={
             "user": wallet,
@@ -330,52 +680,190 @@ def fetch_wallet_recent_cash_24h(wallet: str) -> Optional[float]:
     return total if any_usdc else None
 
 
-def get_wallet_profile(conn: sqlite3.Connection, wallet: str) -> WalletProfile:
-    cached = db_get_wallet_cache(conn, wallet)
-    if cached:
-        return cached
-
-    traded = fetch_traded_markets_count(wallet)
-    first_seen = fetch_wallet_first_seen_ts(wallet)
-    recent_cash_24h = fetch_wallet_recent_cash_24h(wallet)
+async def fetch_wallet_profile(wallet: str, now: int) -> WalletProfile:
+    # Only the scoring inputs; recent_cash_24h is display-only and fetched lazily (fill_recent_cash_24h).
+    # The lookups are independent, so issue them in the same round-trip window.
+    results = await asyncio.gather(
+        fetch_traded_markets_count(wallet),
+        fetch_wallet_first_seen_ts(wallet),
+        return_exceptions=True,
+    )
 
-    profile = WalletProfile(
+    # A failed lookup becomes None and is negative-cached rather than retried on every trade.
+    values: List[Any] = []
+    for r in results:
+        if isinstance(r, Exception) and http_error_status(r) in RATE_LIMIT_STATUSES:
+            # Rate limited: abort the batch so the poll loop backs off (and don't negative-cache)
+            raise r
+        if isinstance(r, Exception):
+            print(f"[enrich] {wallet}: {r}")
+            values.append(None)
+        elif isinstance(r, BaseException):
+            raise r
+        else:
+            values.append(r)
+    traded, first_seen = values
+
+    return WalletProfile(
         wallet=wallet,
         traded_markets=traded,
         first_seen_ts=first_seen,
-        recent_cash_24h=recent_cash_24h,
+        recent_cash_24h=None,
     )
-    db_set_wallet_cache(conn, profile)
-    return profile
+
+
+async def fill_recent_cash_24h(conn: sqlite3.Connection, profiles: List[WalletProfile], now: int) -> None:
+    # Called right before alerting, once for all alerting wallets in the batch; values are
+    # cached so later alerts for the same wallet reuse them
+    missing = [p for p in profiles if not p.recent_cash_fetched]
+    if not missing:
+        return
+    results = await asyncio.gather(
+        *(fetch_wallet_recent_cash_24h(p.wallet, now) for p in missing),
+        return_exceptions=True,
+    )
+
+    filled: List[WalletProfile] = []
+    for p, r in zip(missing, results):
+        if isinstance(r, Exception) and http_error_status(r) in RATE_LIMIT_STATUSES:
+            # Rate limited: abort the batch so the poll loop backs off, as in fetch_wallet_profile
+            raise r
+        if isinstance(r, Exception):
+            print(f"[enrich] {p.wallet}: {r}")
+            continue
+        if isinstance(r, BaseException):
+            raise r
+        # None (no usdcSize data) is cached too, so it isn't refetched on every alert; still shown as "unknown"
+        p.recent_cash_24h = r
+        p.recent_cash_fetched = True
+        filled.append(p)
+
+    if filled:
+        with db_transaction(conn):
+            db_set_wallet_recent_cash(conn, filled)
+
+
+async def get_wallet_profiles(conn: sqlite3.Connection, wallets: Set[str], now: int) -> Dict[str, WalletProfile]:
+    # Each distinct wallet is looked up once per batch, however many trades it made.
+    profiles: Dict[str, WalletProfile] = {}
+    uncached: List[str] = []
+    for wallet in wallets:
+        cached = db_get_wallet_cache(conn, wallet, now)
+        if cached:
+            profiles[wallet] = cached
+        else:
+            uncached.append(wallet)
+
+    if uncached:
+        # Fan out across wallets (bounded by ENRICH_CONCURRENCY)
+        tasks = [asyncio.create_task(fetch_wallet_profile(w, now)) for w in uncached]
+        try:
+            fetched = await asyncio.gather(*tasks)
+        except BaseException:
+            # A failure (e.g. rate limit) aborts the batch: cancel the remaining lookups so
+            # the API isn't still being hit while the poll loop backs off.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        with db_transaction(conn):
+            db_set_wallet_caches(conn, fetched, now)
+        profiles.update((p.wallet, p) for p in fetched)
+    return profiles
 
 
 # ---------------------------
 # Scoring + filtering
 # ---------------------------
 
+def _keyword_regex(keywords: List[str]) -> Optional[re.Pattern[str]]:
+    # One alternation scans the title once instead of once per keyword.
+    words = [k.lower() for k in keywords if k]
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(k) for k in words))
+
+
+_INCLUDE_RE = _keyword_regex(INCLUDE_KEYWORDS)
+_EXCLUDE_RE = _keyword_regex(EXCLUDE_KEYWORDS)
+
+
 def title_allowed(title: str) -> bool:
     t = (title or "").lower()
-    if INCLUDE_KEYWORDS:
-        if not any(k.lower() in t for k in INCLUDE_KEYWORDS):
-            return False
-    if EXCLUDE_KEYWORDS:
-        if any(k.lower() in t for k in EXCLUDE_KEYWORDS):
-            return False
+    if _INCLUDE_RE is not None and not _INCLUDE_RE.search(t):
+        return False
+    if _EXCLUDE_RE is not None and _EXCLUDE_RE.search(t):
+        return False
     return True
 
 
-def days_since(ts: Optional[int]) -> Optional[float]:
+def select_new_trades(conn: sqlite3.Connection, seen_filter: StableBloomFilter, trades: List[Trade]) -> List[Trade]:
+    eligible = [t for t in trades if t.tx_hash and t.proxy_wallet and title_allowed(t.title)]
+    seen = seen_trade_hashes(conn, seen_filter, [t.tx_hash for t in eligible])
+
+    new: List[Trade] = []
+    for t in eligible:
+        if t.tx_hash in seen:
+            continue
+        # Also drops duplicates within the same batch
+        seen.add(t.tx_hash)
+        new.append(t)
+    return new
+
+
+def select_new_trades_vec(conn: sqlite3.Connection, seen_filter: StableBloomFilter, cols: Dict[str, np.ndarray]) -> List[Trade]:
+    # Same result as sorting + select_new_trades(), but filters whole columns first and only
+    # builds Trade objects for rows that survive.
+    tx_hash = cols["tx_hash"]
+    n = len(tx_hash)
+    if n == 0:
+        return []
+
+    mask = cols["valid"] & (tx_hash != "") & (cols["proxy_wallet"] != "")
+    mask &= np.fromiter((title_allowed(title) for title in cols["title"]), dtype=bool, count=n)
+    seen = seen_trade_hashes(conn, seen_filter, tx_hash[mask].tolist())
+    if seen:
+        mask &= np.fromiter((h not in seen for h in tx_hash), dtype=bool, count=n)
+
+    # Process newest last, ordered by (timestamp, tx_hash) like the row path
+    idx = np.flatnonzero(mask)
+    idx = idx[np.lexsort((tx_hash[idx].astype(str), cols["timestamp"][idx]))]
+
+    trades: List[Trade] = []
+    batch_hashes: Set[str] = set()
+    for i in idx:
+        if tx_hash[i] in batch_hashes:
+            continue
+        batch_hashes.add(tx_hash[i])
+        trades.append(
+            Trade(
+                proxy_wallet=cols["proxy_wallet"][i],
+                side=cols["side"][i],
+                condition_id=cols["condition_id"][i],
+                size=float(cols["size"][i]),
+                price=float(cols["price"][i]),
+                timestamp=int(cols["timestamp"][i]),
+                title=cols["title"][i],
+                slug=cols["slug"][i],
+                outcome=cols["outcome"][i],
+                tx_hash=tx_hash[i],
+            )
+        )
+    return trades
+
+
+def days_since(ts: Optional[int], now: float) -> Optional[float]:
     if not ts:
         return None
-    return (time.time() - ts) / 86400.0
+    return (now - ts) / 86400.0
 
 
-def score_trade(t: Trade, p: WalletProfile, cluster_hits: int) -> Tuple[int, List[str]]:
+def score_trade(t: Trade, p: WalletProfile, cluster_hits: int, now: int) -> Tuple[int, List[str]]:
     score = 0
     reasons: List[str] = []
 
     # Fresh wallet
-    age_days = days_since(p.first_seen_ts)
+    age_days = days_since(p.first_seen_ts, now)
     if age_days is not None and age_days <= FRESH_DAYS:
         score += W_FRESH
         reasons.append(f"fresh_wallet({age_days:.1f}d)")
@@ -406,8 +894,8 @@ def score_trade(t: Trade, p: WalletProfile, cluster_hits: int) -> Tuple[int, Lis
 # Alerts
 # ---------------------------
 
-def format_alert(t: Trade, p: WalletProfile, score: int, reasons: List[str], cluster_hits: int) -> str:
-    age_days = days_since(p.first_seen_ts)
+def format_alert(t: Trade, p: WalletProfile, score: int, reasons: List[str], cluster_hits: int, now: int) -> str:
+    age_days = days_since(p.first_seen_ts, now)
     age_str = "unknown" if age_days is None else f"{age_days:.1f}d"
 
     traded_str = "unknown" if p.traded_markets is None else str(p.traded_markets)
@@ -429,12 +917,65 @@ def format_alert(t: Trade, p: WalletProfile, score: int, reasons: List[str], clu
 
 def send_discord(webhook_url: str, content: str) -> None:
     try:
-        r = requests.post(webhook_url, json={"content": content[:1900]}, timeout=15)
+        r = _discord_session.post(
+            webhook_url,
+            data=orjson.dumps({"content": content[:DISCORD_MAX_CHARS]}),
+            headers={"Content-Type": "application/json"},
+            timeout=15,
+        )
         r.raise_for_status()
     except Exception as e:
         print(f"[discord] failed: {e}")
 
 
+# Alerts are posted from a daemon thread so a slow webhook never stalls polling.
+_discord_queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+
+
+def queue_discord(wallet: str, content: str) -> None:
+    _discord_queue.put_nowait((wallet, content))
+
+
+def coalesce_alerts(batch: List[Tuple[str, str]]) -> List[str]:
+    # Join alerts for the same wallet (first-seen order) while they fit in one message
+    grouped: Dict[str, List[str]] = {}
+    for wallet, content in batch:
+        grouped.setdefault(wallet, []).append(content)
+
+    out: List[str] = []
+    for contents in grouped.values():
+        current = contents[0]
+        for content in contents[1:]:
+            if len(current) + 2 + len(content) <= DISCORD_MAX_CHARS:
+                current += "\n\n" + content
+            else:
+                out.append(current)
+                current = content
+        out.append(current)
+    return out
+
+
+def _discord_worker(webhook_url: str) -> None:
+    while True:
+        batch = [_discord_queue.get()]
+        deadline = time.monotonic() + DISCORD_COALESCE_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_discord_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        for content in coalesce_alerts(batch):
+            send_discord(webhook_url, content)
+
+
+def start_discord_worker(webhook_url: str) -> None:
+    threading.Thread(target=_discord_worker, args=(webhook_url,), name="discord-alerts", daemon=True).start()
+
+
 # ---------------------------
 # Main loop
 # ---------------------------
@@ -451,58 +992,131 @@ def main() -> None:
     print(f"- Alert score threshold: {ALERT_SCORE_THRESHOLD}")
     if webhook:
         print("- Discord webhook: enabled")
+        start_discord_worker(webhook)
     else:
         print("- Discord webhook: disabled (set DISCORD_WEBHOOK_URL to enable)")
 
-    while True:
-        try:
-            trades = fetch_recent_large_trades(TRADES_LIMIT, MIN_CASH_FILTER)
-
-            # Process newest last so cluster window and seen logic behave consistently
-            trades = sorted(trades, key=lambda x: (x.timestamp, x.tx_hash))
-
-            for t in trades:
-                if not t.tx_hash or not t.proxy_wallet or not t.title_allowed if False else False:
-                    pass
-
-                if not t.tx_hash or not t.proxy_wallet:
-                    continue
-
-                if not title_allowed(t.title):
-                    continue
-
-                if db_seen_trade(conn, t.tx_hash):
-                    continue
-
-                # Record this as a "hit" regardless; cluster uses hits.
-                db_add_wallet_hit(conn, t.proxy_wallet, t.timestamp)
-
-                # Cluster hits in window
-                window_start = int(time.time()) - (CLUSTER_MINUTES * 60)
-                cluster_hits = db_count_wallet_hits(conn, t.proxy_wallet, window_start)
-
-                # Enrich wallet
-                profile = get_wallet_profile(conn, t.proxy_wallet)
-
-                # Score
-                score, reasons = score_trade(t, profile, cluster_hits)
-
-                # Decide alert
-                if score >= ALERT_SCORE_THRESHOLD:
-                    msg = format_alert(t, profile, score, reasons, cluster_hits)
-                    print("\n" + msg + "\n" + ("-" * 80))
-                    if webhook:
-                        send_discord(webhook, msg)
-
-                # Mark trade as seen so we don't reprocess
-                db_mark_trade_seen(conn, t)
-
-        except requests.HTTPError as e:
-            print(f"[http] {e}")
-        except Exception as e:
-            print(f"[err] {e}")
-
-        time.sleep(POLL_SECONDS)
+    # Rehydrate the in-memory seen filter from recent history
+    now = int(time.time())
+    seen_filter = StableBloomFilter(num_cells=seen_filter_cells(TRADES_LIMIT))
+    for tx_hash in db_recent_trade_hashes(conn, seen_cutoff_ts(now)):
+        seen_filter.add(tx_hash)
+
+    wallet_hits = load_wallet_hits(conn, now - CLUSTER_MINUTES * 60)
+
+    asyncio.run(poll_forever(conn, webhook, seen_filter, wallet_hits))
+
+
+async def poll_forever(
+    conn: sqlite3.Connection,
+    webhook: Optional[str],
+    seen_filter: StableBloomFilter,
+    wallet_hits: WalletHits,
+) -> None:
+    global _aio_session, _enrich_sem
+    last_prune = 0
+    backoff = POLL_SECONDS
+
+    async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}) as session:
+        _aio_session = session
+        _enrich_sem = asyncio.Semaphore(ENRICH_CONCURRENCY)
+
+        while True:
+            delay: float = POLL_SECONDS
+            try:
+                # Read the clock once per poll; everything below in this batch uses it
+                now = int(time.time())
+                window_start = now - CLUSTER_MINUTES * 60
+
+                if now - last_prune >= PRUNE_INTERVAL_SECONDS:
+                    with db_transaction(conn):
+                        pruned = db_prune_seen_trades(conn, seen_cutoff_ts(now))
+                        pruned += db_prune_wallet_hits(conn, window_start)
+                    conn.execute("PRAGMA optimize")
+                    prune_wallet_hits(wallet_hits, window_start)
+                    last_prune = now
+                    if pruned:
+                        print(f"[db] pruned {pruned} old seen_trades/wallet_hits rows")
+
+                if np is not None and TRADES_LIMIT >= VECTORIZE_MIN_TRADES:
+                    cols = fetch_recent_large_trades_vec(TRADES_LIMIT, MIN_CASH_FILTER)
+                    candidates = select_new_trades_vec(conn, seen_filter, cols)
+                else:
+                    trades = fetch_recent_large_trades(TRADES_LIMIT, MIN_CASH_FILTER)
+
+                    # Process newest last so cluster window and seen logic behave consistently
+                    trades = sorted(trades, key=lambda x: (x.timestamp, x.tx_hash))
+
+                    candidates = select_new_trades(conn, seen_filter, trades)
+
+                # Enrich the batch's distinct wallets concurrently
+                profiles = await get_wallet_profiles(conn, {t.proxy_wallet for t in candidates}, now)
+
+                # Rows are buffered and written in one transaction at the end of the batch
+                new_hits: List[Tuple[str, int]] = []
+                new_seen: List[Trade] = []
+                scored: List[Tuple[Trade, WalletProfile, int, List[str], int]] = []
+                try:
+                    for t in candidates:
+                        profile = profiles[t.proxy_wallet]
+
+                        # Record this as a "hit" regardless; cluster uses hits.
+                        # Cluster hits in window (counted in memory; the wallet_hits row is written
+                        # together with the seen row below, only for restart recovery)
+                        cluster_hits = count_wallet_hit(wallet_hits, t.proxy_wallet, t.timestamp, window_start)
+
+                        # Score
+                        score, reasons = score_trade(t, profile, cluster_hits, now)
+                        scored.append((t, profile, score, reasons, cluster_hits))
+
+                    # Display-only 24h cash: fetched concurrently, once per alerting wallet
+                    alerting = {p.wallet: p for _, p, score, _, _ in scored if score >= ALERT_SCORE_THRESHOLD}
+                    await fill_recent_cash_24h(conn, list(alerting.values()), now)
+
+                    for t, profile, score, reasons, cluster_hits in scored:
+                        # Decide alert
+                        if score >= ALERT_SCORE_THRESHOLD:
+                            msg = format_alert(t, profile, score, reasons, cluster_hits, now)
+                            print("\n" + msg + "\n" + ("-" * 80))
+                            if webhook:
+                                queue_discord(t.proxy_wallet, msg)
+
+                        # Mark trade as seen so we don't reprocess
+                        new_hits.append((t.proxy_wallet, t.timestamp))
+                        new_seen.append(t)
+                        seen_filter.add(t.tx_hash)
+                finally:
+                    # Trades not marked seen (batch aborted, e.g. rate limited) are reprocessed next
+                    # poll; take back their in-memory hits so they aren't counted twice.
+                    for t, *_ in scored[len(new_seen):]:
+                        dq = wallet_hits.get(t.proxy_wallet)
+                        if dq is not None and t.timestamp in dq:
+                            dq.remove(t.timestamp)
+
+                    # Flush even if a later trade failed, so already-alerted trades stay seen
+                    if new_hits or new_seen:
+                        with db_transaction(conn):
+                            db_add_wallet_hits(conn, new_hits)
+                            db_mark_trades_seen(conn, new_seen)
+
+                backoff = POLL_SECONDS
+
+            except (requests.HTTPError, aiohttp.ClientResponseError) as e:
+                print(f"[http] {e}")
+                # The batch may not have been fully processed; make the next poll refetch it
+                _etags.clear()
+
+                status = http_error_status(e)
+                if status in RATE_LIMIT_STATUSES:
+                    backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                    retry_after = retry_after_seconds(e)
+                    delay = retry_after if retry_after is not None else backoff
+                    print(f"[http] rate limited ({status}), next poll in {delay:.0f}s")
+            except Exception as e:
+                print(f"[err] {e}")
+                _etags.clear()
+
+            await asyncio.sleep(delay)
 
 
 if __name__ == "__main__":